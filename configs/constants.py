@@ -6,9 +6,9 @@ UNK = '<unk>'
 PAD = '<pad>'
 
 
-TRAIN_DATASET_FILENAME = 'train_data.json'
-VALIDATION_DATASET_FILENAME = 'valid_data.json'
-INSTANT_DATASET_FILENAME = 'instant_data.json'
+TRAIN_DATASET_FILENAME = 'train_data'
+VALIDATION_DATASET_FILENAME = 'valid_data'
+INSTANT_DATASET_FILENAME = 'instant_data'
 
 INPUT_VOCAB_FILENAME = 'input_vocab.json'
 TAG_VOCAB_FILENAME = 'label_vocab.json'
@@ -18,3 +18,7 @@ TGT_VOCAB_FILENAME = 'target_vocab.json'
 
 RANDOM_SEED = 49
 LARGE_NUMBER = 2e16
+
+# set above 1 (or -1 for all cores) to numerize large corpora in parallel
+NUMERIZE_N_JOBS = 1
+NUMERIZE_PARALLEL_MIN_LINES = 100000
@@ -1,27 +1,58 @@
 import os
 import logging
-from typing import List, Dict
-import json
+from typing import List, Dict, Iterable
 from pathlib import Path
+from itertools import chain, repeat
 
-from sklearn.model_selection import train_test_split
+import numpy as np
+import torch
+from joblib import Parallel, delayed, effective_n_jobs
 from torch.utils.data import DataLoader
 
 from configs.constants import INPUT_VOCAB_FILENAME, TAG_VOCAB_FILENAME, CLASS_VOCAB_FILENAME, \
     TRAIN_DATASET_FILENAME, VALIDATION_DATASET_FILENAME, INSTANT_DATASET_FILENAME, RANDOM_SEED, SRC_VOCAB_FILENAME, \
-    TGT_VOCAB_FILENAME
+    TGT_VOCAB_FILENAME, NUMERIZE_N_JOBS, NUMERIZE_PARALLEL_MIN_LINES
 
 from data_manager.vocab import Vocabulary
-from data_manager.dataset import SequenceTagDatasetFromJSONFile, JointClsNTagDatasetFromJSONFile, \
-    SequencePairDatasetFromJSONFile
+from data_manager.dataset import SequenceTagDatasetFromNPYDir, JointClsNTagDatasetFromNPYDir, \
+    SequencePairDatasetFromNPYDir, SequenceTagDatasetFromDict, JointClsNTagDatasetFromDict, \
+    SequencePairDatasetFromDict, RaggedSequences, save_ragged_arrays
 
-from utils import make_dir_if_not_exist, load_text
+from utils import make_dir_if_not_exist, load_text, iter_text
 
 from prepro.word_segment import labelize, remove_multiple_spaces
 
 logger = logging.getLogger(__name__)
 
 
+def _numerize_chunk(lines: Iterable, word_to_idx: Dict, unknown_idx: int) -> RaggedSequences:
+    # lines may already be split into tokens by build_vocabulary, or be a stream of text lines
+    if isinstance(lines, list) and lines and isinstance(lines[0], list):
+        tokenized_lines = lines
+    else:
+        tokenized_lines = (line.split() for line in lines)
+
+    lengths = list()
+
+    def _record_lengths(_tokenized_lines):
+        for tokens in _tokenized_lines:
+            lengths.append(len(tokens))
+            yield tokens
+
+    tokens = chain.from_iterable(_record_lengths(tokenized_lines))
+
+    if unknown_idx is None:
+        indices = map(word_to_idx.__getitem__, tokens)
+    else:
+        indices = map(word_to_idx.get, tokens, repeat(unknown_idx))
+
+    values = np.fromiter(indices, dtype=np.int32)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    return RaggedSequences(values, offsets)
+
+
 class DatasetBuilder(object):
     @property
     def source_vocab(self):
@@ -50,24 +81,75 @@ class DatasetBuilder(object):
     def _split_into_valid_and_train(self, input, label, test_size=0.1, random_state=RANDOM_SEED):
         raise NotImplementedError()
 
-    def _numerize_from_text(self, data: List[str], vocab: Vocabulary):
-        splited_data = self._splitify(data)
+    def _split(self, *arrays, test_size=0.1, random_state=RANDOM_SEED):
+        num_data = len(arrays[0])
+        indices = np.random.default_rng(random_state).permutation(num_data)
+        cut = num_data - int(np.ceil(num_data * test_size))
+
+        if cut <= 0 or cut >= num_data:
+            raise ValueError()
+
+        train_indices, test_indices = indices[:cut], indices[cut:]
+
+        return tuple([array[i] for i in train_indices] for array in arrays), \
+            tuple([array[i] for i in test_indices] for array in arrays)
 
-        return [vocab.to_indices(s_d) for s_d in splited_data]
+    def _numerize_from_text(self, data: Iterable, vocab: Vocabulary, n_jobs: int = NUMERIZE_N_JOBS) -> RaggedSequences:
+        n_chunks = effective_n_jobs(n_jobs)
+
+        if not isinstance(data, list) or n_chunks == 1 or len(data) < NUMERIZE_PARALLEL_MIN_LINES:
+            return _numerize_chunk(data, vocab.word_to_idx, vocab.unknown_idx)
+
+        # one chunk per worker, so the vocabulary is pickled once per process instead of once per line
+        chunk_size = -(-len(data) // n_chunks)
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+        numerized_chunks = Parallel(n_jobs=n_jobs)(delayed(_numerize_chunk)(chunk, vocab.word_to_idx, vocab.unknown_idx)
+                                                   for chunk in chunks)
+
+        return RaggedSequences.concatenate(numerized_chunks)
 
     def _splitify(self, data: List[str]) -> List[List]:
         return [s.split() for s in data]
 
     def _load_text(self, path: Path) -> List[str]:
         logger.info('load text dataset: {}'.format(path))
+
         return load_text(path)
 
-    def _save_as_json(self, obj: Dict, json_path: str) -> None:
-        with open(json_path, 'w') as jsonfile:
-            json.dump(obj, jsonfile, indent=4)
+    def _save_as_npy(self, obj: Dict[str, RaggedSequences], dataset_path: Path) -> None:
+        save_ragged_arrays(obj, dataset_path)
 
         return
 
+    def _data_loader_options(self, num_workers: int = None, prefetch_factor: int = 2, pin_memory: bool = None) -> Dict:
+        # more workers is not always faster: past a few processes the IPC and GIL contention outweighs the gain
+        if num_workers is None:
+            num_workers = min(4, os.cpu_count() or 1)
+        logger.info('data loader uses {} workers'.format(num_workers))
+
+        # pinned batches only help host to GPU copies
+        if pin_memory is None:
+            pin_memory = torch.cuda.is_available()
+
+        if num_workers == 0:
+            return {'num_workers': 0, 'pin_memory': pin_memory}
+
+        return {'num_workers': num_workers,
+                'pin_memory': pin_memory,
+                'persistent_workers': True,
+                'prefetch_factor': prefetch_factor}
+
+    def _check_dataset_format(self) -> None:
+        # datasets used to be saved as one json file each, they are directories of npy arrays now
+        for filename in [TRAIN_DATASET_FILENAME, VALIDATION_DATASET_FILENAME]:
+            legacy_path = self._dataset_dir / (filename + '.json')
+            dataset_path = self._dataset_dir / filename
+
+            if legacy_path.exists() or (dataset_path.is_dir() and not any(dataset_path.glob('*_values.npy'))):
+                raise ValueError('{} holds a dataset saved in an old format, '
+                                 'remove it and build the dataset again'.format(self._dataset_dir))
+
     def _build_dataset_dir(self):
         logger.info('build dataset directory...')
         make_dir_if_not_exist(self._dataset_dir)
@@ -80,36 +162,37 @@ class NERDatasetBuilder(DatasetBuilder):
                  file_type: str = 'text',
                  input_vocab: Vocabulary = None,
                  label_vocab: Vocabulary = None,
-                 dataset_dir: str = Path('./dataset/ner')):
+                 dataset_dir: Path = Path('./dataset/ner')):
 
-        self._dataset_dir = dataset_dir
+        self._dataset_dir = Path(dataset_dir).resolve()
+        self._input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
+        self._label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
         self._has_resource = False
 
         if os.path.isdir(self._dataset_dir):
+            self._check_dataset_format()
+
             try:
                 train_data_save_path = self._dataset_dir / TRAIN_DATASET_FILENAME
                 valid_data_save_path = self._dataset_dir / VALIDATION_DATASET_FILENAME
 
-                input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
-                label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
-
                 if not os.path.exists(train_data_save_path):
                     raise FileNotFoundError()
 
                 if not os.path.exists(valid_data_save_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(input_vocab_path):
+                if not os.path.exists(self._input_vocab_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(label_vocab_path):
+                if not os.path.exists(self._label_vocab_path):
                     raise FileNotFoundError()
 
-                self._src_vocab = Vocabulary().from_json(input_vocab_path)
-                self._tgt_vocab = Vocabulary().from_json(label_vocab_path)
+                self._src_vocab = Vocabulary().from_json(self._input_vocab_path)
+                self._tgt_vocab = Vocabulary().from_json(self._label_vocab_path)
 
-                self._train_data_path = [train_data_save_path]
-                self._valid_data_path = [valid_data_save_path]
+                self._train_data_path = train_data_save_path
+                self._valid_data_path = valid_data_save_path
 
                 self._has_resource = True
 
@@ -117,21 +200,20 @@ class NERDatasetBuilder(DatasetBuilder):
             except:
                 raise ValueError()
 
-        self._input_path = input_path
-        self._label_path = label_path
+        self._input_path = Path(input_path)
+        self._label_path = Path(label_path)
         self._file_type = file_type
 
-        if file_type == 'text':
-            self._raw_input = self._load_text(self._input_path)
-            self._raw_label = self._load_text(self._label_path)
-        else:
-            raise NotImplementedError()
+        self._load_raw_text()
 
         self._src_vocab = input_vocab
         self._tgt_vocab = label_vocab
 
-        self._train_data_path = list()
-        self._valid_data_path = list()
+        self._input_tokens = None
+        self._label_tokens = None
+
+        self._train_data_path = None
+        self._valid_data_path = None
 
         self._build_dataset_dir()
 
@@ -141,31 +223,33 @@ class NERDatasetBuilder(DatasetBuilder):
         if self._has_resource:
             return
 
-        input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
-        label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
-
         if self._src_vocab is None:
             logger.info('build input text vocabulary...')
             self._src_vocab = Vocabulary(max_size=max_size, min_freq=min_freq, bos_token=None, eos_token=None)
             input_data = self._splitify(self._raw_input)
             self._src_vocab.fit(input_data)
+            self._input_tokens = input_data
+            self._raw_input = None
 
         if self._tgt_vocab is None:
             logger.info('build label vocabulary...')
             self._tgt_vocab = Vocabulary(unknown_token=None)
             label_data = self._splitify(self._raw_label)
             self._tgt_vocab.fit(label_data)
+            self._label_tokens = label_data
+            self._raw_label = None
 
-        self._src_vocab.to_json(input_vocab_path)
+        self._src_vocab.to_json(self._input_vocab_path)
         logger.info('save input text vocabulary...')
-        self._tgt_vocab.to_json(label_vocab_path)
+        self._tgt_vocab.to_json(self._label_vocab_path)
         logger.info('save label vocabulary...')
 
         return
 
     def build_trainable_dataset(self,
-                                train_data_path: str = None,
-                                valid_data_path: str = None) -> None:
+                                train_data_path: Path = None,
+                                valid_data_path: Path = None,
+                                n_jobs: int = NUMERIZE_N_JOBS) -> None:
         if self._has_resource:
             return
 
@@ -173,78 +257,98 @@ class NERDatasetBuilder(DatasetBuilder):
             raise ValueError()
 
         train_data = dict()
-        train_data_path = self._dataset_dir / TRAIN_DATASET_FILENAME if train_data_path is None else train_data_path
+        train_data_path = self._dataset_dir / TRAIN_DATASET_FILENAME if train_data_path is None else Path(train_data_path)
 
         valid_data = dict()
-        valid_data_path = self._dataset_dir / VALIDATION_DATASET_FILENAME if valid_data_path is None else valid_data_path
+        valid_data_path = self._dataset_dir / VALIDATION_DATASET_FILENAME if valid_data_path is None else Path(valid_data_path)
+
+        if self._input_tokens is None and self._raw_input is None:
+            self._load_raw_text()
 
         logger.info('split train and valid dataset: test split rate is 0.1')
-        train_raw_data, valid_raw_data = self._split_into_valid_and_train(self._raw_input, self._raw_label)
+        input_data = self._input_tokens if self._input_tokens is not None else self._raw_input
+        label_data = self._label_tokens if self._label_tokens is not None else self._raw_label
+        train_raw_data, valid_raw_data = self._split_into_valid_and_train(input_data, label_data)
+        self._release_text()
 
-        train_data['inputs'] = self._numerize_from_text(train_raw_data[0], self._src_vocab)
-        train_data['entities'] = self._numerize_from_text(train_raw_data[1], self._tgt_vocab)
+        train_data['inputs'] = self._numerize_from_text(train_raw_data[0], self._src_vocab, n_jobs=n_jobs)
+        train_data['entities'] = self._numerize_from_text(train_raw_data[1], self._tgt_vocab, n_jobs=n_jobs)
 
-        valid_data['inputs'] = self._numerize_from_text(valid_raw_data[0], self._src_vocab)
-        valid_data['entities'] = self._numerize_from_text(valid_raw_data[1], self._tgt_vocab)
+        valid_data['inputs'] = self._numerize_from_text(valid_raw_data[0], self._src_vocab, n_jobs=n_jobs)
+        valid_data['entities'] = self._numerize_from_text(valid_raw_data[1], self._tgt_vocab, n_jobs=n_jobs)
 
-        logger.info('save train and valid dataset as json format.')
-        self._save_as_json(train_data, train_data_path)
-        self._save_as_json(valid_data, valid_data_path)
+        logger.info('save train and valid dataset as npy format.')
+        self._save_as_npy(train_data, train_data_path)
+        self._save_as_npy(valid_data, valid_data_path)
 
-        self._train_data_path.append(train_data_path)
-        self._valid_data_path.append(valid_data_path)
+        self._train_data_path = train_data_path
+        self._valid_data_path = valid_data_path
 
         return
 
-    def build_instant_data_loader(self, input_path, label_path, data_path=None):
+    def build_instant_data_loader(self, input_path, label_path, data_path=None, persist=False):
         instant_data = dict()
-        data_path = self._dataset_dir / INSTANT_DATASET_FILENAME if data_path is None else data_path
+        data_path = self._dataset_dir / INSTANT_DATASET_FILENAME if data_path is None else Path(data_path)
 
-        input_data = self._load_text(input_path)
-        label_data = self._load_text(label_path)
+        instant_data['inputs'] = self._numerize_from_text(iter_text(input_path), self._src_vocab)
+        instant_data['entities'] = self._numerize_from_text(iter_text(label_path), self._tgt_vocab)
 
-        instant_data['inputs'] = self._numerize_from_text(input_data, self._src_vocab)
-        instant_data['entities'] = self._numerize_from_text(label_data, self._tgt_vocab)
+        if persist:
+            self._save_as_npy(instant_data, data_path)
 
-        self._save_as_json(instant_data, data_path)
-
-        instant_dataset = SequenceTagDatasetFromJSONFile(data_path)
+        instant_dataset = SequenceTagDatasetFromDict(instant_data)
 
         instant_data_loader = DataLoader(instant_dataset,
                                          batch_size=1)
 
         return instant_data_loader
 
-    def build_data_loader(self, batch_size, limit_pad_len, valid_batch_size=1, enable_length=True):
+    def build_data_loader(self, batch_size, limit_pad_len, valid_batch_size=1, enable_length=True,
+                          num_workers=None, prefetch_factor=2, pin_memory=None):
+        if self._train_data_path is None or self._valid_data_path is None:
+            raise ValueError()
+
         logger.info('now get training dataloader object...')
-        train_dataset = SequenceTagDatasetFromJSONFile(self._train_data_path[0],
+        data_loader_options = self._data_loader_options(num_workers, prefetch_factor, pin_memory)
+
+        train_dataset = SequenceTagDatasetFromNPYDir(self._train_data_path,
                                                        limit_pad_len=limit_pad_len,
                                                        enable_length=enable_length)
 
         if valid_batch_size <= 1:
             limit_pad_len = None
 
-        valid_dataset = SequenceTagDatasetFromJSONFile(self._valid_data_path[0],
+        valid_dataset = SequenceTagDatasetFromNPYDir(self._valid_data_path,
                                                        limit_pad_len=limit_pad_len)
 
         train_data_loader = DataLoader(train_dataset,
                                        batch_size=batch_size,
                                        shuffle=True,
-                                       num_workers=4,
-                                       drop_last=True)
+                                       drop_last=True,
+                                       **data_loader_options)
 
         valid_data_loader = DataLoader(valid_dataset,
                                        batch_size=valid_batch_size,
-                                       num_workers=4)
+                                       **data_loader_options)
 
         return train_data_loader, valid_data_loader
 
     def _split_into_valid_and_train(self, input, label, test_size=0.1, random_state=RANDOM_SEED):
-        input_train, input_test, label_train, label_test = train_test_split(input, label,
-                                                                            test_size=test_size,
-                                                                            random_state=random_state)
+        return self._split(input, label, test_size=test_size, random_state=random_state)
+
+    def _load_raw_text(self):
+        if self._file_type == 'text':
+            self._raw_input = self._load_text(self._input_path)
+            self._raw_label = self._load_text(self._label_path)
+        else:
+            raise NotImplementedError()
 
-        return (input_train, label_train), (input_test, label_test)
+    def _release_text(self):
+        # the splits are all that is left to numerize, a repeat build reads the text files again
+        self._raw_input = None
+        self._raw_label = None
+        self._input_tokens = None
+        self._label_tokens = None
 
 
 class SLUDatasetBuilder(DatasetBuilder):
@@ -256,40 +360,41 @@ class SLUDatasetBuilder(DatasetBuilder):
                  input_vocab: Vocabulary = None,
                  label_vocab: Vocabulary = None,
                  class_vocab: Vocabulary = None,
-                 dataset_dir: str = Path('./dataset/slu')):
-        self._dataset_dir = dataset_dir
+                 dataset_dir: Path = Path('./dataset/slu')):
+        self._dataset_dir = Path(dataset_dir).resolve()
+        self._input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
+        self._label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
+        self._class_vocab_path = self._dataset_dir / CLASS_VOCAB_FILENAME
         self._has_resource = False
 
         if os.path.isdir(self._dataset_dir):
+            self._check_dataset_format()
+
             try:
                 train_data_save_path = self._dataset_dir / TRAIN_DATASET_FILENAME
                 valid_data_save_path = self._dataset_dir / VALIDATION_DATASET_FILENAME
 
-                input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
-                label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
-                class_vocab_path = self._dataset_dir / CLASS_VOCAB_FILENAME
-
                 if not os.path.exists(train_data_save_path):
                     raise FileNotFoundError()
 
                 if not os.path.exists(valid_data_save_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(input_vocab_path):
+                if not os.path.exists(self._input_vocab_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(label_vocab_path):
+                if not os.path.exists(self._label_vocab_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(class_vocab_path):
+                if not os.path.exists(self._class_vocab_path):
                     raise FileNotFoundError()
 
-                self._src_vocab = Vocabulary().from_json(input_vocab_path)
-                self._tgt_vocab = Vocabulary().from_json(label_vocab_path)
-                self._cls_vocab = Vocabulary().from_json(class_vocab_path)
+                self._src_vocab = Vocabulary().from_json(self._input_vocab_path)
+                self._tgt_vocab = Vocabulary().from_json(self._label_vocab_path)
+                self._cls_vocab = Vocabulary().from_json(self._class_vocab_path)
 
-                self._train_data_path = [train_data_save_path]
-                self._valid_data_path = [valid_data_save_path]
+                self._train_data_path = train_data_save_path
+                self._valid_data_path = valid_data_save_path
 
                 self._has_resource = True
 
@@ -297,24 +402,22 @@ class SLUDatasetBuilder(DatasetBuilder):
             except:
                 raise ValueError()
 
-        self._input_path = input_path
-        self._label_path = label_path
-        self._class_path = class_path
+        self._input_path = Path(input_path)
+        self._label_path = Path(label_path)
+        self._class_path = Path(class_path)
         self._file_type = file_type
 
-        if file_type == 'text':
-            self._raw_input = self._load_text(self._input_path)
-            self._raw_label = self._load_text(self._label_path)
-            self._raw_class = self._load_text(self._class_path)
-        else:
-            raise NotImplementedError()
+        self._load_raw_text()
 
         self._src_vocab = input_vocab
         self._tgt_vocab = label_vocab
         self._cls_vocab = class_vocab
 
-        self._train_data_path = list()
-        self._valid_data_path = list()
+        self._input_tokens = None
+        self._label_tokens = None
+
+        self._train_data_path = None
+        self._valid_data_path = None
 
         self._build_dataset_dir()
 
@@ -324,21 +427,21 @@ class SLUDatasetBuilder(DatasetBuilder):
         if self._has_resource:
             return
 
-        input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
-        label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
-        class_vocab_path = self._dataset_dir / CLASS_VOCAB_FILENAME
-
         if self._src_vocab is None:
             logger.info('build input text vocabulary...')
             self._src_vocab = Vocabulary(max_size=max_size, min_freq=min_freq, bos_token=None, eos_token=None)
             input_data = self._splitify(self._raw_input)
             self._src_vocab.fit(input_data)
+            self._input_tokens = input_data
+            self._raw_input = None
 
         if self._tgt_vocab is None:
             logger.info('build label vocabulary...')
             self._tgt_vocab = Vocabulary(unknown_token=None)
             label_data = self._splitify(self._raw_label)
             self._tgt_vocab.fit(label_data)
+            self._label_tokens = label_data
+            self._raw_label = None
 
         if self._cls_vocab is None:
             logger.info('build class vocabulary...')
@@ -347,17 +450,18 @@ class SLUDatasetBuilder(DatasetBuilder):
             self._cls_vocab.fit(class_data)
 
         logger.info('save input text vocabulary...')
-        self._src_vocab.to_json(input_vocab_path)
+        self._src_vocab.to_json(self._input_vocab_path)
         logger.info('save label vocabulary...')
-        self._tgt_vocab.to_json(label_vocab_path)
+        self._tgt_vocab.to_json(self._label_vocab_path)
         logger.info('save class vocabulary...')
-        self._cls_vocab.to_json(class_vocab_path)
+        self._cls_vocab.to_json(self._class_vocab_path)
 
         return
 
     def build_trainable_dataset(self,
-                                train_data_save_path: str = None,
-                                valid_data_save_path: str = None) -> None:
+                                train_data_save_path: Path = None,
+                                valid_data_save_path: Path = None,
+                                n_jobs: int = NUMERIZE_N_JOBS) -> None:
         if self._has_resource:
             return
 
@@ -365,69 +469,77 @@ class SLUDatasetBuilder(DatasetBuilder):
             raise ValueError()
 
         train_data = dict()
-        train_data_save_path = self._dataset_dir / TRAIN_DATASET_FILENAME if train_data_save_path is None else train_data_save_path
+        train_data_save_path = self._dataset_dir / TRAIN_DATASET_FILENAME if train_data_save_path is None else Path(train_data_save_path)
 
         valid_data = dict()
-        valid_data_save_path = self._dataset_dir / VALIDATION_DATASET_FILENAME if valid_data_save_path is None else valid_data_save_path
+        valid_data_save_path = self._dataset_dir / VALIDATION_DATASET_FILENAME if valid_data_save_path is None else Path(valid_data_save_path)
+
+        if self._input_tokens is None and self._raw_input is None:
+            self._load_raw_text()
 
         logger.info('split train and valid dataset: test split rate is 0.1')
-        train_raw_data, valid_raw_data = self._split_into_valid_and_train(self._raw_input, self._raw_label,
-                                                                          self._raw_class)
+        input_data = self._input_tokens if self._input_tokens is not None else self._raw_input
+        label_data = self._label_tokens if self._label_tokens is not None else self._raw_label
+        train_raw_data, valid_raw_data = self._split_into_valid_and_train(input_data, label_data, self._raw_class)
+        self._release_text()
 
-        train_data['inputs'] = self._numerize_from_text(train_raw_data[0], self._src_vocab)
-        train_data['slots'] = self._numerize_from_text(train_raw_data[1], self._tgt_vocab)
-        train_data['intents'] = self._numerize_from_text(train_raw_data[2], self._cls_vocab)
+        train_data['inputs'] = self._numerize_from_text(train_raw_data[0], self._src_vocab, n_jobs=n_jobs)
+        train_data['slots'] = self._numerize_from_text(train_raw_data[1], self._tgt_vocab, n_jobs=n_jobs)
+        train_data['intents'] = self._numerize_from_text(train_raw_data[2], self._cls_vocab, n_jobs=n_jobs)
 
-        valid_data['inputs'] = self._numerize_from_text(valid_raw_data[0], self._src_vocab)
-        valid_data['slots'] = self._numerize_from_text(valid_raw_data[1], self._tgt_vocab)
-        valid_data['intents'] = self._numerize_from_text(valid_raw_data[2], self._cls_vocab)
+        valid_data['inputs'] = self._numerize_from_text(valid_raw_data[0], self._src_vocab, n_jobs=n_jobs)
+        valid_data['slots'] = self._numerize_from_text(valid_raw_data[1], self._tgt_vocab, n_jobs=n_jobs)
+        valid_data['intents'] = self._numerize_from_text(valid_raw_data[2], self._cls_vocab, n_jobs=n_jobs)
 
-        logger.info('save train and valid dataset as json format.')
-        self._save_as_json(train_data, train_data_save_path)
-        self._save_as_json(valid_data, valid_data_save_path)
+        logger.info('save train and valid dataset as npy format.')
+        self._save_as_npy(train_data, train_data_save_path)
+        self._save_as_npy(valid_data, valid_data_save_path)
 
-        self._train_data_path.append(train_data_save_path)
-        self._valid_data_path.append(valid_data_save_path)
+        self._train_data_path = train_data_save_path
+        self._valid_data_path = valid_data_save_path
 
         return
 
-    def build_instant_data_loader(self, input_path, label_path, class_path, data_path=None):
+    def build_instant_data_loader(self, input_path, label_path, class_path, data_path=None, persist=False):
         instant_data = dict()
-        data_path = self._dataset_dir / INSTANT_DATASET_FILENAME if data_path is None else data_path
-
-        input_data = self._load_text(input_path)
-        label_data = self._load_text(label_path)
-        class_data = self._load_text(class_path)
+        data_path = self._dataset_dir / INSTANT_DATASET_FILENAME if data_path is None else Path(data_path)
 
-        instant_data['inputs'] = self._numerize_from_text(input_data, self._src_vocab)
-        instant_data['slots'] = self._numerize_from_text(label_data, self._tgt_vocab)
-        instant_data['intents'] = self._numerize_from_text(class_data, self._cls_vocab)
+        instant_data['inputs'] = self._numerize_from_text(iter_text(input_path), self._src_vocab)
+        instant_data['slots'] = self._numerize_from_text(iter_text(label_path), self._tgt_vocab)
+        instant_data['intents'] = self._numerize_from_text(iter_text(class_path), self._cls_vocab)
 
-        self._save_as_json(instant_data, data_path)
+        if persist:
+            self._save_as_npy(instant_data, data_path)
 
-        instant_dataset = JointClsNTagDatasetFromJSONFile(data_path)
+        instant_dataset = JointClsNTagDatasetFromDict(instant_data)
 
         instant_data_loader = DataLoader(instant_dataset,
                                          batch_size=1)
 
         return instant_data_loader
 
-    def build_data_loader(self, batch_size, limit_pad_len, valid_batch_size=1, enable_length=True):
+    def build_data_loader(self, batch_size, limit_pad_len, valid_batch_size=1, enable_length=True,
+                          num_workers=None, prefetch_factor=2, pin_memory=None):
+        if self._train_data_path is None or self._valid_data_path is None:
+            raise ValueError()
+
         logger.info('now get training dataloader object...')
-        train_dataset = JointClsNTagDatasetFromJSONFile(self._train_data_path[0],
+        data_loader_options = self._data_loader_options(num_workers, prefetch_factor, pin_memory)
+
+        train_dataset = JointClsNTagDatasetFromNPYDir(self._train_data_path,
                                                         limit_pad_len=limit_pad_len,
                                                         enable_length=enable_length)
         if valid_batch_size <= 1:
             limit_pad_len = None
 
-        valid_dataset = JointClsNTagDatasetFromJSONFile(self._valid_data_path[0],
+        valid_dataset = JointClsNTagDatasetFromNPYDir(self._valid_data_path,
                                                         limit_pad_len=limit_pad_len)
 
         train_data_loader = DataLoader(train_dataset,
                                        batch_size=batch_size,
                                        shuffle=True,
-                                       num_workers=4,
-                                       drop_last=True)
+                                       drop_last=True,
+                                       **data_loader_options)
 
         valid_data_loader = DataLoader(valid_dataset,
                                        batch_size=valid_batch_size)
@@ -435,11 +547,22 @@ class SLUDatasetBuilder(DatasetBuilder):
         return train_data_loader, valid_data_loader
 
     def _split_into_valid_and_train(self, input, label, cls, test_size=0.1, random_state=RANDOM_SEED):
-        input_train, input_test, label_train, label_test, class_train, class_test = train_test_split(input, label, cls,
-                                                                                                     test_size=test_size,
-                                                                                                     random_state=random_state)
+        return self._split(input, label, cls, test_size=test_size, random_state=random_state)
 
-        return (input_train, label_train, class_train), (input_test, label_test, class_test)
+    def _load_raw_text(self):
+        if self._file_type == 'text':
+            self._raw_input = self._load_text(self._input_path)
+            self._raw_label = self._load_text(self._label_path)
+            self._raw_class = self._load_text(self._class_path)
+        else:
+            raise NotImplementedError()
+
+    def _release_text(self):
+        self._raw_input = None
+        self._raw_label = None
+        self._raw_class = None
+        self._input_tokens = None
+        self._label_tokens = None
 
 
 class WordSegmentationDatasetBuilder(NERDatasetBuilder):
@@ -449,39 +572,40 @@ class WordSegmentationDatasetBuilder(NERDatasetBuilder):
                  input_vocab: Vocabulary = None,
                  label_vocab: Vocabulary = None,
                  bi_tags_only: bool = False,
-                 dataset_dir: str = Path('./dataset/word_segment')):
+                 dataset_dir: Path = Path('./dataset/word_segment')):
 
-        self._dataset_dir = dataset_dir
+        self._dataset_dir = Path(dataset_dir).resolve()
+        self._input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
+        self._label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
         self._has_resource = False
 
         if input_vocab is not None:
             logger.info('use existing input vocabulary.')
 
         if os.path.isdir(self._dataset_dir):
+            self._check_dataset_format()
+
             try:
                 train_data_save_path = self._dataset_dir / TRAIN_DATASET_FILENAME
                 valid_data_save_path = self._dataset_dir / VALIDATION_DATASET_FILENAME
 
-                input_vocab_path = self._dataset_dir / INPUT_VOCAB_FILENAME
-                label_vocab_path = self._dataset_dir / TAG_VOCAB_FILENAME
-
                 if not os.path.exists(train_data_save_path):
                     raise FileNotFoundError()
 
                 if not os.path.exists(valid_data_save_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(input_vocab_path):
+                if not os.path.exists(self._input_vocab_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(label_vocab_path):
+                if not os.path.exists(self._label_vocab_path):
                     raise FileNotFoundError()
 
-                self._src_vocab = Vocabulary().from_json(input_vocab_path)
-                self._tgt_vocab = Vocabulary().from_json(label_vocab_path)
+                self._src_vocab = Vocabulary().from_json(self._input_vocab_path)
+                self._tgt_vocab = Vocabulary().from_json(self._label_vocab_path)
 
-                self._train_data_path = [train_data_save_path]
-                self._valid_data_path = [valid_data_save_path]
+                self._train_data_path = train_data_save_path
+                self._valid_data_path = valid_data_save_path
 
                 self._has_resource = True
 
@@ -490,39 +614,42 @@ class WordSegmentationDatasetBuilder(NERDatasetBuilder):
                 raise ValueError()
 
         self._bi_tags_only = bi_tags_only
-        self._input_path = input_path
+        self._input_path = Path(input_path)
         self._file_type = file_type
 
         self._label = None
 
-        if file_type == 'text':
-            self._input_text = self._load_text(self._input_path)
-        else:
-            raise NotImplementedError()
-
-        logger.info('now labelize dataset...')
-        self._raw_input, self._raw_label = self._self_labelize(self._input_text)
+        self._load_raw_text()
 
         self._src_vocab = input_vocab
         self._tgt_vocab = label_vocab
 
-        self._train_data_path = list()
-        self._valid_data_path = list()
+        self._input_tokens = None
+        self._label_tokens = None
+
+        self._train_data_path = None
+        self._valid_data_path = None
 
         self._build_dataset_dir()
 
+    def _load_raw_text(self):
+        if self._file_type == 'text':
+            input_text = self._load_text(self._input_path)
+        else:
+            raise NotImplementedError()
+
+        logger.info('now labelize dataset...')
+        self._raw_input, self._raw_label = self._self_labelize(input_text)
+
     def _self_labelize(self, text_dataset):
-        inputs, labels = list(), list()
+        inputs, labels = [None] * len(text_dataset), [None] * len(text_dataset)
 
-        for s in text_dataset:
+        for i, s in enumerate(text_dataset):
             s = remove_multiple_spaces(s)
             s, t = labelize(s, bi_tags_only=self._bi_tags_only)
 
-            s = ' '.join([ch for ch in s])
-            t = ' '.join([ch for ch in t])
-
-            inputs.append(s)
-            labels.append(t)
+            inputs[i] = ' '.join(s)
+            labels[i] = ' '.join(t)
 
         return inputs, labels
 
@@ -536,34 +663,35 @@ class SequencePairDatasetBuilder(DatasetBuilder):
                  tgt_vocab: Vocabulary = None,
                  dataset_dir: Path = Path('./dataset/seq_pair')):
 
-        self._dataset_dir = dataset_dir
+        self._dataset_dir = Path(dataset_dir).resolve()
+        self._src_vocab_path = self._dataset_dir / SRC_VOCAB_FILENAME
+        self._tgt_vocab_path = self._dataset_dir / TGT_VOCAB_FILENAME
         self._has_resource = False
 
         if self._dataset_dir.exists():
+            self._check_dataset_format()
+
             try:
                 train_data_save_path = self._dataset_dir / TRAIN_DATASET_FILENAME
                 valid_data_save_path = self._dataset_dir / VALIDATION_DATASET_FILENAME
 
-                src_vocab_path = self._dataset_dir / SRC_VOCAB_FILENAME
-                tgt_vocab_path = self._dataset_dir / TGT_VOCAB_FILENAME
-
                 if not os.path.exists(train_data_save_path):
                     raise FileNotFoundError()
 
                 if not os.path.exists(valid_data_save_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(src_vocab_path):
+                if not os.path.exists(self._src_vocab_path):
                     raise FileNotFoundError()
 
-                if not os.path.exists(tgt_vocab_path):
+                if not os.path.exists(self._tgt_vocab_path):
                     raise FileNotFoundError()
 
-                self._src_vocab = Vocabulary().from_json(src_vocab_path)
-                self._tgt_vocab = Vocabulary().from_json(tgt_vocab_path)
+                self._src_vocab = Vocabulary().from_json(self._src_vocab_path)
+                self._tgt_vocab = Vocabulary().from_json(self._tgt_vocab_path)
 
-                self._train_data_path = [train_data_save_path]
-                self._valid_data_path = [valid_data_save_path]
+                self._train_data_path = train_data_save_path
+                self._valid_data_path = valid_data_save_path
 
                 self._has_resource = True
 
@@ -571,21 +699,20 @@ class SequencePairDatasetBuilder(DatasetBuilder):
             except:
                 raise ValueError()
 
-        self._src_path = src_path
-        self._tgt_path = tgt_path
+        self._src_path = Path(src_path)
+        self._tgt_path = Path(tgt_path)
         self._file_type = file_type
 
-        if file_type == 'text':
-            self._raw_src = self._load_text(self._src_path)
-            self._raw_tgt = self._load_text(self._tgt_path)
-        else:
-            raise NotImplementedError()
+        self._load_raw_text()
 
         self._src_vocab = src_vocab
         self._tgt_vocab = tgt_vocab
 
-        self._train_data_path = list()
-        self._valid_data_path = list()
+        self._src_tokens = None
+        self._tgt_tokens = None
+
+        self._train_data_path = None
+        self._valid_data_path = None
 
         self._build_dataset_dir()
 
@@ -595,31 +722,33 @@ class SequencePairDatasetBuilder(DatasetBuilder):
         if self._has_resource:
             return
 
-        src_vocab_path = self._dataset_dir / SRC_VOCAB_FILENAME
-        tgt_vocab_path = self._dataset_dir / TGT_VOCAB_FILENAME
-
         if self._src_vocab is None:
             logger.info('build source text vocabulary...')
             self._src_vocab = Vocabulary(max_size=max_size, min_freq=min_freq)
             src_data = self._splitify(self._raw_src)
             self._src_vocab.fit(src_data)
+            self._src_tokens = src_data
+            self._raw_src = None
 
         if self._tgt_vocab is None:
             logger.info('build target text vocabulary...')
             self._tgt_vocab = Vocabulary(max_size=max_size, min_freq=min_freq)
             tgt_data = self._splitify(self._raw_tgt)
             self._tgt_vocab.fit(tgt_data)
+            self._tgt_tokens = tgt_data
+            self._raw_tgt = None
 
-        self._src_vocab.to_json(src_vocab_path)
+        self._src_vocab.to_json(self._src_vocab_path)
         logger.info('save input text vocabulary...')
-        self._tgt_vocab.to_json(tgt_vocab_path)
+        self._tgt_vocab.to_json(self._tgt_vocab_path)
         logger.info('save label vocabulary...')
 
         return
 
     def build_trainable_dataset(self,
-                                train_data_path: str = None,
-                                valid_data_path: str = None) -> None:
+                                train_data_path: Path = None,
+                                valid_data_path: Path = None,
+                                n_jobs: int = NUMERIZE_N_JOBS) -> None:
         if self._has_resource:
             return
 
@@ -627,42 +756,46 @@ class SequencePairDatasetBuilder(DatasetBuilder):
             raise ValueError()
 
         train_data = dict()
-        train_data_path = self._dataset_dir / TRAIN_DATASET_FILENAME if train_data_path is None else train_data_path
+        train_data_path = self._dataset_dir / TRAIN_DATASET_FILENAME if train_data_path is None else Path(train_data_path)
 
         valid_data = dict()
-        valid_data_path = self._dataset_dir / VALIDATION_DATASET_FILENAME if valid_data_path is None else valid_data_path
+        valid_data_path = self._dataset_dir / VALIDATION_DATASET_FILENAME if valid_data_path is None else Path(valid_data_path)
+
+        if self._src_tokens is None and self._raw_src is None:
+            self._load_raw_text()
 
         logger.info('split train and valid dataset: test split rate is 0.1')
-        train_raw_data, valid_raw_data = self._split_into_valid_and_train(self._raw_src, self._raw_tgt)
+        src_data = self._src_tokens if self._src_tokens is not None else self._raw_src
+        tgt_data = self._tgt_tokens if self._tgt_tokens is not None else self._raw_tgt
+        train_raw_data, valid_raw_data = self._split_into_valid_and_train(src_data, tgt_data)
+        self._release_text()
 
-        train_data['sources'] = self._numerize_from_text(train_raw_data[0], self._src_vocab)
-        train_data['targets'] = self._numerize_from_text(train_raw_data[1], self._tgt_vocab)
+        train_data['sources'] = self._numerize_from_text(train_raw_data[0], self._src_vocab, n_jobs=n_jobs)
+        train_data['targets'] = self._numerize_from_text(train_raw_data[1], self._tgt_vocab, n_jobs=n_jobs)
 
-        valid_data['sources'] = self._numerize_from_text(valid_raw_data[0], self._src_vocab)
-        valid_data['targets'] = self._numerize_from_text(valid_raw_data[1], self._tgt_vocab)
+        valid_data['sources'] = self._numerize_from_text(valid_raw_data[0], self._src_vocab, n_jobs=n_jobs)
+        valid_data['targets'] = self._numerize_from_text(valid_raw_data[1], self._tgt_vocab, n_jobs=n_jobs)
 
-        logger.info('save train and valid dataset as json format.')
-        self._save_as_json(train_data, train_data_path)
-        self._save_as_json(valid_data, valid_data_path)
+        logger.info('save train and valid dataset as npy format.')
+        self._save_as_npy(train_data, train_data_path)
+        self._save_as_npy(valid_data, valid_data_path)
 
-        self._train_data_path.append(train_data_path)
-        self._valid_data_path.append(valid_data_path)
+        self._train_data_path = train_data_path
+        self._valid_data_path = valid_data_path
 
         return
 
-    def build_instant_data_loader(self, src_path, tgt_path, data_path=None):
+    def build_instant_data_loader(self, src_path, tgt_path, data_path=None, persist=False):
         instant_data = dict()
-        data_path = self._dataset_dir / INSTANT_DATASET_FILENAME if data_path is None else data_path
-
-        src_data = self._load_text(src_path)
-        tgt_data = self._load_text(tgt_path)
+        data_path = self._dataset_dir / INSTANT_DATASET_FILENAME if data_path is None else Path(data_path)
 
-        instant_data['sources'] = self._numerize_from_text(src_data, self._src_vocab)
-        instant_data['targets'] = self._numerize_from_text(tgt_data, self._tgt_vocab)
+        instant_data['sources'] = self._numerize_from_text(iter_text(src_path), self._src_vocab)
+        instant_data['targets'] = self._numerize_from_text(iter_text(tgt_path), self._tgt_vocab)
 
-        self._save_as_json(instant_data, data_path)
+        if persist:
+            self._save_as_npy(instant_data, data_path)
 
-        instant_dataset = SequencePairDatasetFromJSONFile(data_path)
+        instant_dataset = SequencePairDatasetFromDict(instant_data)
 
         instant_data_loader = DataLoader(instant_dataset,
                                          batch_size=1)
@@ -670,9 +803,14 @@ class SequencePairDatasetBuilder(DatasetBuilder):
         return instant_data_loader
 
     def build_data_loader(self, batch_size, limit_src_pad_len, limit_tgt_pad_len, valid_batch_size=1,
-                          enable_length=True):
+                          enable_length=True, num_workers=None, prefetch_factor=2, pin_memory=None):
+        if self._train_data_path is None or self._valid_data_path is None:
+            raise ValueError()
+
         logger.info('now get training dataloader object...')
-        train_dataset = SequencePairDatasetFromJSONFile(self._train_data_path[0],
+        data_loader_options = self._data_loader_options(num_workers, prefetch_factor, pin_memory)
+
+        train_dataset = SequencePairDatasetFromNPYDir(self._train_data_path,
                                                         limit_src_pad_len=limit_src_pad_len,
                                                         limit_tgt_pad_len=limit_tgt_pad_len,
                                                         enable_length=enable_length)
@@ -681,25 +819,34 @@ class SequencePairDatasetBuilder(DatasetBuilder):
             limit_src_pad_len = None
             limit_tgt_pad_len = None
 
-        valid_dataset = SequencePairDatasetFromJSONFile(self._valid_data_path[0],
+        valid_dataset = SequencePairDatasetFromNPYDir(self._valid_data_path,
                                                         limit_src_pad_len=limit_src_pad_len,
                                                         limit_tgt_pad_len=limit_tgt_pad_len)
 
         train_data_loader = DataLoader(train_dataset,
                                        batch_size=batch_size,
                                        shuffle=True,
-                                       num_workers=4,
-                                       drop_last=True)
+                                       drop_last=True,
+                                       **data_loader_options)
 
         valid_data_loader = DataLoader(valid_dataset,
                                        batch_size=valid_batch_size,
-                                       num_workers=4)
+                                       **data_loader_options)
 
         return train_data_loader, valid_data_loader
 
     def _split_into_valid_and_train(self, input, label, test_size=0.1, random_state=RANDOM_SEED):
-        input_train, input_test, label_train, label_test = train_test_split(input, label,
-                                                                            test_size=test_size,
-                                                                            random_state=random_state)
+        return self._split(input, label, test_size=test_size, random_state=random_state)
+
+    def _load_raw_text(self):
+        if self._file_type == 'text':
+            self._raw_src = self._load_text(self._src_path)
+            self._raw_tgt = self._load_text(self._tgt_path)
+        else:
+            raise NotImplementedError()
 
-        return (input_train, label_train), (input_test, label_test)
+    def _release_text(self):
+        self._raw_src = None
+        self._raw_tgt = None
+        self._src_tokens = None
+        self._tgt_tokens = None
@@ -1,5 +1,6 @@
-from typing import Tuple, Dict
-import json
+import os
+from typing import Tuple, Dict, List
+from pathlib import Path
 
 import numpy as np
 
@@ -7,14 +8,64 @@ from torch import Tensor
 from torch.utils.data import Dataset
 
 
-class SequenceTagDatasetFromJSONFile(Dataset):
+class RaggedSequences(object):
+    def __init__(self, values: np.ndarray, offsets: np.ndarray) -> None:
+        self.values = values
+        self.offsets = offsets
+
+        return
+
+    @classmethod
+    def concatenate(cls, chunks: List):
+        values = np.concatenate([chunk.values for chunk in chunks])
+        offsets = [chunks[0].offsets[:1]]
+
+        for chunk in chunks:
+            offsets.append(chunk.offsets[1:] + offsets[-1][-1])
+
+        return cls(values, np.concatenate(offsets))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        # copy the sequence out, the buffer may be a read-only memory map shared by the loader workers
+        return np.array(self.values[self.offsets[idx]:self.offsets[idx + 1]])
+
+
+def save_ragged_arrays(dataset: Dict[str, RaggedSequences], dir_path: Path) -> None:
+    dir_path = Path(dir_path)
+    os.makedirs(dir_path, exist_ok=True)
+
+    # clear fields left by an earlier build, load_ragged_arrays reads every field in the directory
+    for stale_path in list(dir_path.glob('*_values.npy')) + list(dir_path.glob('*_offsets.npy')):
+        stale_path.unlink()
+
+    for key, ragged in dataset.items():
+        np.save(dir_path / (key + '_values.npy'), ragged.values)
+        np.save(dir_path / (key + '_offsets.npy'), ragged.offsets)
+
+    return
+
+
+def load_ragged_arrays(dir_path: Path, mmap_mode: str = 'r') -> Dict[str, RaggedSequences]:
+    dir_path = Path(dir_path)
+    keys = [path.name[:-len('_values.npy')] for path in dir_path.glob('*_values.npy')]
+
+    if not keys:
+        raise FileNotFoundError('no ragged arrays found in {}'.format(dir_path))
+
+    return {key: RaggedSequences(np.load(dir_path / (key + '_values.npy'), mmap_mode=mmap_mode),
+                                 np.load(dir_path / (key + '_offsets.npy'), mmap_mode=mmap_mode))
+            for key in keys}
+
+
+class SequenceTagDatasetFromDict(Dataset):
     def __init__(self,
-                 json_path: str,
+                 dataset: Dict,
                  enable_length: bool = True,
                  limit_pad_len: int = None,
                  pad_value: int = 0) -> None:
-        dataset = json.load(open(json_path, 'rb'))
-
         self._inputs = dataset['inputs']
         self._entities = dataset['entities']
 
@@ -56,17 +107,27 @@ class SequenceTagDatasetFromJSONFile(Dataset):
         return sampled_instances
 
 
-class JointClsNTagDatasetFromJSONFile(Dataset):
+class SequenceTagDatasetFromNPYDir(SequenceTagDatasetFromDict):
     def __init__(self,
-                 json_path: str,
+                 dataset_path: Path,
                  enable_length: bool = True,
                  limit_pad_len: int = None,
                  pad_value: int = 0) -> None:
-        dataset = json.load(open(json_path, 'rb'))
+        super(SequenceTagDatasetFromNPYDir, self).__init__(load_ragged_arrays(dataset_path),
+                                                            enable_length=enable_length,
+                                                            limit_pad_len=limit_pad_len,
+                                                            pad_value=pad_value)
 
-        self._inputs = np.array(dataset['inputs'])
-        self._slots = np.array(dataset['slots'])
-        self._intents = np.array(dataset['intents'])
+
+class JointClsNTagDatasetFromDict(Dataset):
+    def __init__(self,
+                 dataset: Dict,
+                 enable_length: bool = True,
+                 limit_pad_len: int = None,
+                 pad_value: int = 0) -> None:
+        self._inputs = dataset['inputs']
+        self._slots = dataset['slots']
+        self._intents = dataset['intents']
 
         self.enable_length = enable_length
         self.limit_pad_len = limit_pad_len
@@ -108,6 +169,18 @@ class JointClsNTagDatasetFromJSONFile(Dataset):
         return sampled_instances
 
 
+class JointClsNTagDatasetFromNPYDir(JointClsNTagDatasetFromDict):
+    def __init__(self,
+                 dataset_path: Path,
+                 enable_length: bool = True,
+                 limit_pad_len: int = None,
+                 pad_value: int = 0) -> None:
+        super(JointClsNTagDatasetFromNPYDir, self).__init__(load_ragged_arrays(dataset_path),
+                                                             enable_length=enable_length,
+                                                             limit_pad_len=limit_pad_len,
+                                                             pad_value=pad_value)
+
+
 def pad_sequences(dataset, limit_len, pad_value=0):
     if isinstance(dataset[0], list):
         batch_size = len(dataset)
@@ -128,15 +201,13 @@ def pad_sequences(dataset, limit_len, pad_value=0):
     return padded_sequences
 
 
-class SequencePairDatasetFromJSONFile(Dataset):
+class SequencePairDatasetFromDict(Dataset):
     def __init__(self,
-                 json_path: str,
+                 dataset: Dict,
                  enable_length: bool = True,
                  limit_src_pad_len: int = None,
                  limit_tgt_pad_len: int = None,
                  pad_value: int = 0) -> None:
-        dataset = json.load(open(json_path, 'rb'))
-
         self._sources = dataset['sources']
         self._targets = dataset['targets']
 
@@ -187,3 +258,17 @@ class SequencePairDatasetFromJSONFile(Dataset):
         sampled_instances['targets']['value'] = Tensor(sampled_targets).long()
 
         return sampled_instances
+
+
+class SequencePairDatasetFromNPYDir(SequencePairDatasetFromDict):
+    def __init__(self,
+                 dataset_path: Path,
+                 enable_length: bool = True,
+                 limit_src_pad_len: int = None,
+                 limit_tgt_pad_len: int = None,
+                 pad_value: int = 0) -> None:
+        super(SequencePairDatasetFromNPYDir, self).__init__(load_ragged_arrays(dataset_path),
+                                                             enable_length=enable_length,
+                                                             limit_src_pad_len=limit_src_pad_len,
+                                                             limit_tgt_pad_len=limit_tgt_pad_len,
+                                                             pad_value=pad_value)
@@ -1,6 +1,12 @@
+import sys
 from pathlib import Path
-from data_manager.builder import NERDatasetBuilder, SLUDatasetBuilder, SequencePairDatasetBuilder
+import numpy as np
+import pytest
+from data_manager.builder import DatasetBuilder, NERDatasetBuilder, SLUDatasetBuilder, SequencePairDatasetBuilder, \
+    _numerize_chunk
+from data_manager.vocab import Vocabulary
 from torch.utils.data import DataLoader
+from utils import load_text, iter_text
 
 
 def test_ner_dataset_builder_build_dataloader_as_default():
@@ -225,3 +231,116 @@ def test_seq_pair_dataset_instant_lodaer_iterate():
     assert isinstance(valid_batch, dict)
     assert len(valid_batch['sources']['value']) == 1
 
+
+def test_numerize_chunk_matches_vocab_indices():
+    dummy_lines = ['나는 한국에 살고 있어요',
+                   '한국에 사는건 쉽지 않아요',
+                   '학교종이 울리면 모여야 해요']
+
+    vocab = Vocabulary()
+    vocab.fit([line.split() for line in dummy_lines[:2]])
+
+    numerized_lines = _numerize_chunk(dummy_lines, vocab.word_to_idx, vocab.unknown_idx)
+
+    assert len(numerized_lines) == len(dummy_lines)
+    assert [numerized_lines[i].tolist() for i in range(len(dummy_lines))] == \
+        [vocab.to_indices(line.split()) for line in dummy_lines]
+    assert numerized_lines[2].tolist() == [vocab.unknown_idx] * 4
+
+
+def test_numerize_from_text_in_parallel_matches_serial(monkeypatch):
+    dummy_lines = ['나는 한국에 살고 있어요',
+                   '한국에 사는건 쉽지 않아요',
+                   '학교종이 울리면 모여야 해요'] * 5
+
+    vocab = Vocabulary()
+    vocab.fit([line.split() for line in dummy_lines[:2]])
+    tokenized_lines = [line.split() for line in dummy_lines]
+
+    monkeypatch.setattr('data_manager.builder.NUMERIZE_PARALLEL_MIN_LINES', 1)
+    builder = DatasetBuilder()
+    serial_lines = builder._numerize_from_text(tokenized_lines, vocab, n_jobs=1)
+
+    for n_jobs in [2, 4]:
+        parallel_lines = builder._numerize_from_text(tokenized_lines, vocab, n_jobs=n_jobs)
+
+        assert np.array_equal(parallel_lines.values, serial_lines.values)
+        assert np.array_equal(parallel_lines.offsets, serial_lines.offsets)
+
+
+def test_split_into_valid_and_train_keeps_alignment():
+    dummy_inputs = ['input {}'.format(i) for i in range(25)]
+    dummy_labels = ['label {}'.format(i) for i in range(25)]
+
+    train_data, valid_data = DatasetBuilder()._split(dummy_inputs, dummy_labels, test_size=0.1)
+
+    assert len(train_data[0]) == 22
+    assert len(valid_data[0]) == 3
+    assert sorted(train_data[0] + valid_data[0]) == sorted(dummy_inputs)
+    assert [l.split()[1] for l in valid_data[1]] == [i.split()[1] for i in valid_data[0]]
+
+
+def test_split_into_valid_and_train_rejects_empty_side():
+    with pytest.raises(ValueError):
+        DatasetBuilder()._split(['input 0'], ['label 0'], test_size=0.1)
+
+    with pytest.raises(ValueError):
+        DatasetBuilder()._split(['input 0', 'input 1'], ['label 0', 'label 1'], test_size=0.0)
+
+
+def test_ner_dataset_builder_releases_corpus_after_build(tmp_path):
+    input_path = './data_manager/test/test_dataset/ner/input.txt'
+    label_path = './data_manager/test/test_dataset/ner/output.txt'
+
+    ner_builder = NERDatasetBuilder(input_path, label_path, dataset_dir=tmp_path / 'train_dataset')
+
+    ner_builder.build_vocabulary()
+    first_tokens = ner_builder._input_tokens[0]
+    ner_builder.build_trainable_dataset()
+
+    assert not [name for name, value in vars(ner_builder).items() if isinstance(value, (list, tuple))]
+    assert sys.getrefcount(first_tokens) == 2
+
+    ner_builder.build_trainable_dataset()
+    train_data_loader, _ = ner_builder.build_data_loader(2, 10)
+
+    assert len(train_data_loader.dataset) > 0
+
+
+def test_ner_dataset_builder_rejects_legacy_json_dataset(tmp_path):
+    input_path = './data_manager/test/test_dataset/ner/input.txt'
+    label_path = './data_manager/test/test_dataset/ner/output.txt'
+
+    dataset_dir = tmp_path / 'train_dataset'
+    dataset_dir.mkdir()
+    (dataset_dir / 'train_data.json').write_text('{}', encoding='utf-8')
+
+    with pytest.raises(ValueError, match='build the dataset again'):
+        NERDatasetBuilder(input_path, label_path, dataset_dir=dataset_dir)
+
+
+def test_slu_dataset_builder_strips_trailing_whitespace(tmp_path):
+    input_path = tmp_path / 'input.txt'
+    label_path = tmp_path / 'output.txt'
+    class_path = tmp_path / 'class.txt'
+
+    input_path.write_text('play some music\nbook a table \x0c\n', encoding='utf-8')
+    label_path.write_text('O O B\nO O B\n', encoding='utf-8')
+    class_path.write_text('PlayMusic \nBookRestaurant\t\n', encoding='utf-8')
+
+    slu_builder = SLUDatasetBuilder(input_path, label_path, class_path, dataset_dir=tmp_path / 'train_dataset')
+
+    slu_builder.build_vocabulary()
+    slu_builder.build_trainable_dataset()
+
+    assert 'PlayMusic' in slu_builder.class_vocab.word_to_idx
+    assert 'PlayMusic ' not in slu_builder.class_vocab.word_to_idx
+    assert len(slu_builder._load_text(input_path)) == len(slu_builder._load_text(label_path))
+
+
+def test_load_text_splits_only_on_newlines(tmp_path):
+    text_path = tmp_path / 'input.txt'
+    text_path.write_text('first\x1cline \t\nsecond\u2028line\n', encoding='utf-8')
+
+    assert load_text(text_path) == ['first\x1cline', 'second\u2028line']
+    assert list(iter_text(text_path)) == load_text(text_path)
@@ -1,6 +1,7 @@
 import numpy as np
+import pytest
 
-from data_manager.dataset import pad_sequences
+from data_manager.dataset import pad_sequences, RaggedSequences, save_ragged_arrays, load_ragged_arrays
 
 
 def test_pad_sequences_without_pad_val():
@@ -44,3 +45,64 @@ def test_pad_sequences_with_pad_val():
     padded_dataset = pad_sequences(np_dummy_dataset, limit_len, pad_value=pad_val)
 
     assert padded_dataset.all() == np_answer_dataset.all()
+
+
+def _ragged(sequences):
+    offsets = np.cumsum([0] + [len(sequence) for sequence in sequences])
+
+    return RaggedSequences(np.array([idx for sequence in sequences for idx in sequence], np.int32),
+                           np.array(offsets, np.int64))
+
+
+def test_ragged_sequences_index_sequences():
+    dummy_dataset = [[1, 2, 3, 1],
+                     [1],
+                     [1, 2, 3]]
+
+    ragged_dataset = _ragged(dummy_dataset)
+
+    assert len(ragged_dataset) == len(dummy_dataset)
+    assert ragged_dataset.values.dtype == np.int32
+    assert [ragged_dataset[i].tolist() for i in range(len(ragged_dataset))] == dummy_dataset
+
+
+def test_ragged_sequences_concatenate():
+    first_dataset = [[1, 2, 3, 1],
+                     [1]]
+    second_dataset = [[1, 2],
+                      [1, 2, 3]]
+
+    ragged_dataset = RaggedSequences.concatenate([_ragged(first_dataset), _ragged(second_dataset)])
+
+    assert len(ragged_dataset) == len(first_dataset) + len(second_dataset)
+    assert [ragged_dataset[i].tolist() for i in range(len(ragged_dataset))] == first_dataset + second_dataset
+
+
+def test_ragged_arrays_load_as_memory_map(tmp_path):
+    dummy_dataset = {'inputs': [[1, 2, 3, 1], [1], [1, 2, 3]],
+                     'entities': [[4, 5, 6, 4], [4], [4, 5, 6]]}
+
+    save_ragged_arrays({key: _ragged(value) for key, value in dummy_dataset.items()}, tmp_path / 'train_data')
+    loaded_dataset = load_ragged_arrays(tmp_path / 'train_data')
+
+    assert sorted(loaded_dataset.keys()) == sorted(dummy_dataset.keys())
+    assert isinstance(loaded_dataset['inputs'].values, np.memmap)
+    for key, value in dummy_dataset.items():
+        assert [loaded_dataset[key][i].tolist() for i in range(len(value))] == value
+
+
+def test_ragged_arrays_drop_stale_fields_on_save(tmp_path):
+    save_ragged_arrays({'inputs': _ragged([[1, 2]]), 'entities': _ragged([[3, 4]])}, tmp_path / 'train_data')
+    save_ragged_arrays({'inputs': _ragged([[5]])}, tmp_path / 'train_data')
+
+    assert list(load_ragged_arrays(tmp_path / 'train_data').keys()) == ['inputs']
+
+
+def test_ragged_arrays_raise_on_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_ragged_arrays(tmp_path / 'train_data')
+
+    (tmp_path / 'empty_data').mkdir()
+
+    with pytest.raises(FileNotFoundError):
+        load_ragged_arrays(tmp_path / 'empty_data')
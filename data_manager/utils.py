@@ -37,7 +37,10 @@ def create_builder(type, dataset_configs, deploy_path='./tmp'):
     else:
         builder.build_vocabulary()
 
-    builder.build_trainable_dataset()
+    if 'numerize_n_jobs' in dataset_configs:
+        builder.build_trainable_dataset(n_jobs=dataset_configs['numerize_n_jobs'])
+    else:
+        builder.build_trainable_dataset()
 
     return builder
 
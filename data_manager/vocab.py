@@ -1,10 +1,11 @@
 import logging
 import copy
-import json
 from typing import List, NewType
 from collections import Counter
 from pathlib import Path
 
+import orjson
+
 from configs.constants import PAD, UNK, START_TAG, STOP_TAG
 
 Vocabulary = NewType('Vocabulary', object)
@@ -101,14 +102,12 @@ class Vocabulary(object):
         vocab_obj['word_to_idx'] = self._word_to_idx
         vocab_obj['idx_to_word'] = self._idx_to_word
 
-        with open(json_path, 'w') as jsonfile:
-            json.dump(vocab_obj, jsonfile, indent=4)
+        Path(json_path).write_bytes(orjson.dumps(vocab_obj))
 
         return
 
     def from_json(self, json_path: Path) -> Vocabulary:
-        with open(json_path, 'r') as jsonfile:
-            vocab_obj = json.load(jsonfile)
+        vocab_obj = orjson.loads(Path(json_path).read_bytes())
 
         self.max_size = vocab_obj['max_size']
         self.min_freq = vocab_obj['min_freq']
@@ -132,6 +131,10 @@ class Vocabulary(object):
     def idx_to_word(self):
         return self._idx_to_word
 
+    @property
+    def unknown_idx(self):
+        return self._word_to_idx[self.unknown_token] if self.unknown_token is not None else None
+
     def __len__(self):
         return len(self._idx_to_word)
 
@@ -161,7 +164,7 @@ class Vocabulary(object):
             return False
         if not self.word_frequency == other.word_frequency:
             return False
-        if not self._word_to_idx == other.source_to_idx:
+        if not self._word_to_idx == other.word_to_idx:
             return False
         if not self._idx_to_word == other.idx_to_word:
             return False
@@ -75,8 +75,8 @@ class SequencePairModelTrainer(Trainer):
                                         total=len(self._valid_data_loader)):
             batch_size = sampled_batch['sources']['value'].size(0)
 
-            input_batch = sampled_batch['sources']['value'].view(batch_size, -1).to(self._device)
-            target_batch = sampled_batch['targets']['value'].view(batch_size, -1).to(self._device)
+            input_batch = sampled_batch['sources']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
+            target_batch = sampled_batch['targets']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
 
             loss = self._model.loss(input_batch, target_batch)
             val_loss += loss.item()
@@ -100,8 +100,8 @@ class SequencePairModelTrainer(Trainer):
             batch_size = sampled_batch['sources']['value'].size(0)
             total_steps = epoch * steps_in_epoch + (step + 1)
 
-            input_batch = sampled_batch['sources']['value'].view(batch_size, -1).to(self._device)
-            target_batch = sampled_batch['targets']['value'].view(batch_size, -1).to(self._device)
+            input_batch = sampled_batch['sources']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
+            target_batch = sampled_batch['targets']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
 
             loss = self._model.loss(input_batch, target_batch)
             tr_loss += loss.item()
@@ -78,9 +78,9 @@ class JointSequenceTagAndClassModelTrainer(Trainer):
                                         total=len(self._valid_data_loader)):
             batch_size = sampled_batch['inputs']['value'].size(0)
 
-            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device)
-            target_batch = sampled_batch['slots'].view(batch_size, -1).to(self._device)
-            class_batch = sampled_batch['intents'].to(self._device)
+            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
+            target_batch = sampled_batch['slots'].view(batch_size, -1).to(self._device, non_blocking=True)
+            class_batch = sampled_batch['intents'].to(self._device, non_blocking=True)
 
             pred_score, tag_seq, class_prob = self._model(input_batch)
             score += torch.mean(pred_score).item()
@@ -120,9 +120,9 @@ class JointSequenceTagAndClassModelTrainer(Trainer):
             total_steps = epoch * steps_in_epoch + (step + 1)
             batch_size = sampled_batch['inputs']['value'].size(0)
 
-            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device)
-            target_batch = sampled_batch['slots'].view(batch_size, -1).to(self._device)
-            class_batch = sampled_batch['intents'].to(self._device)
+            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
+            target_batch = sampled_batch['slots'].view(batch_size, -1).to(self._device, non_blocking=True)
+            class_batch = sampled_batch['intents'].to(self._device, non_blocking=True)
 
             tag_loss, class_loss = self._model.loss(input_batch, target_batch, class_batch)
 
@@ -81,8 +81,8 @@ class SequenceTaggingModelTrainer(Trainer):
                                         total=len(self._valid_data_loader)):
             batch_size = sampled_batch['inputs']['value'].size(0)
 
-            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device)
-            target_batch = sampled_batch['entities'].view(batch_size, -1).to(self._device)
+            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
+            target_batch = sampled_batch['entities'].view(batch_size, -1).to(self._device, non_blocking=True)
 
             pred_score, tag_seq = self._model(input_batch)
             score += torch.mean(pred_score).item()
@@ -113,8 +113,8 @@ class SequenceTaggingModelTrainer(Trainer):
             batch_size = sampled_batch['inputs']['value'].size(0)
             total_steps = epoch * steps_in_epoch + (step + 1)
 
-            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device)
-            target_batch = sampled_batch['entities'].view(batch_size, -1).to(self._device)
+            input_batch = sampled_batch['inputs']['value'].view(batch_size, -1).to(self._device, non_blocking=True)
+            target_batch = sampled_batch['entities'].view(batch_size, -1).to(self._device, non_blocking=True)
 
             loss = self._model.loss(input_batch, target_batch)
             tr_loss += loss.cpu().item()
@@ -1,3 +1,5 @@
+import torch
+
 from configs.constants import PAD, START_TAG, STOP_TAG
 
 from trainer.seq_tag_trainer import SequenceTaggingModelTrainer
@@ -8,18 +10,25 @@ from trainer.seq_pair_trainer import SequencePairModelTrainer
 def create_trainer(type, model, data_builder, train_configs, gpu_device=-1, deploy_path='./tmp'):
     learning_rate = train_configs['learning_rate'] if 'learning_rate' in train_configs else 3e-4
     eval_batch_size = train_configs['eval_batch_size'] if 'eval_batch_size' in train_configs else 1
+    num_workers = train_configs['num_workers'] if 'num_workers' in train_configs else None
+    pin_memory = train_configs['pin_memory'] if 'pin_memory' in train_configs \
+        else torch.cuda.is_available() and gpu_device >= 0
 
     if type == 'ner' or type == 'word_segment' or type == 'slu':
         train_data_loader, valid_data_loader = data_builder.build_data_loader(train_configs['batch_size'],
                                                                               train_configs['sequence_length'],
                                                                               valid_batch_size=eval_batch_size,
-                                                                              enable_length=True)
+                                                                              enable_length=True,
+                                                                              num_workers=num_workers,
+                                                                              pin_memory=pin_memory)
     elif type == 'translate':
         train_data_loader, valid_data_loader = data_builder.build_data_loader(train_configs['batch_size'],
                                                                               train_configs['sequence_length'],
                                                                               train_configs['sequence_length'],
                                                                               valid_batch_size=eval_batch_size,
-                                                                              enable_length=True)
+                                                                              enable_length=True,
+                                                                              num_workers=num_workers,
+                                                                              pin_memory=pin_memory)
 
     if type == 'ner' or type == 'word_segment':
         tag_vocabs = data_builder.target_vocab.idx_to_word
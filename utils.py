@@ -5,7 +5,7 @@ import os
 import sys
 from pathlib import Path
 
-from typing import List
+from typing import List, Iterator
 
 import torch
 
@@ -30,20 +30,13 @@ def load_json(path):
 
 
 def load_text(path: Path) -> List[str]:
-    dataset = list()
-    filelines = get_filelines(path)
+    return list(iter_text(path))
 
-    with open(path, 'r') as textfile:
-        for i in range(filelines):
-            textline = ''
-            try:
-                textline = textfile.readline().rstrip().replace('\n', '')
-            except ValueError() as e:
-                pass
 
-            dataset.append(textline)
-
-    return dataset
+def iter_text(path: Path) -> Iterator[str]:
+    with open(path, 'r', encoding='utf-8', errors='ignore') as textfile:
+        for textline in textfile:
+            yield textline.rstrip()
 
 
 def make_dir_if_not_exist(dir_path: str):
@@ -51,10 +44,6 @@ def make_dir_if_not_exist(dir_path: str):
         os.makedirs(dir_path)
 
 
-def get_filelines(path: Path) -> int:
-    return sum([1 for _ in open(path)])
-
-
 def load_model(path: Path, model: torch.nn.Module, strict=False) -> torch.nn.Module:
     model.load_state_dict(torch.load(path, map_location='cpu'), strict=strict)
     return model